@@ -1,22 +1,48 @@
 from __future__ import annotations
 
+import asyncio
+import atexit
+import contextlib
 import csv
+import heapq
 import json
 import logging
 import os
 import re
 import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from collections import defaultdict, deque
-from dataclasses import dataclass, asdict
-from typing import Any, Dict, Iterable, List, Optional
-from urllib.parse import quote_plus
-
+from itertools import chain
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import quote_plus, urlsplit, urlunsplit
+
+import orjson
 from flask import Flask, Response, jsonify, render_template, request
-from playwright.sync_api import TimeoutError, sync_playwright
+from flask.json.provider import JSONProvider
+from playwright.async_api import Error as PlaywrightError, TimeoutError, async_playwright
+
+try:
+    import uvloop
+except ImportError:  # not available on Windows
+    uvloop = None
+
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson; dataclasses such as Product serialize natively."""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
 
 app = Flask(__name__, template_folder="templates")
+app.json = OrjsonProvider(app)
 logging.basicConfig(
     level=os.getenv("LOG_LEVEL", "INFO").upper(),
     format="%(asctime)s %(levelname)s %(name)s: %(message)s",
@@ -26,7 +52,7 @@ logger = logging.getLogger("dealfinder")
 START_TIME = time.time()
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Product:
     name: str
     price: Optional[float]
@@ -36,7 +62,55 @@ class Product:
     auction_end: Optional[float] = None
 
 
+class TTLCache:
+    """
+    Thread-safe LRU mapping whose entries expire ttl_sec after they were stored.
+    A maxsize or ttl_sec of 0 disables caching.
+    """
+
+    def __init__(self, maxsize: int, ttl_sec: float) -> None:
+        self.maxsize = maxsize
+        self.ttl_sec = ttl_sec
+        self._entries: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Any, value: Any) -> None:
+        if self.maxsize <= 0 or self.ttl_sec <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_sec, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
 PRICE_PATTERN = re.compile(r"\$\s*([0-9]{1,3}(?:,[0-9]{3})*|[0-9]+)(?:\.(\d{2}))?")
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+# Byte table equivalent of lower() + TOKEN_PATTERN for ASCII text: letters fold to lowercase,
+# every other byte becomes a space.
+TOKEN_TRANSLATION = bytes(
+    ord(char.lower()) if char.isascii() and char.isalnum() else ord(" ")
+    for char in map(chr, range(256))
+)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+# Query parameters that only track the click and never pick a different item, on any site; a
+# listing reached through several of them is still one listing. Site-specific ones live in
+# each provider's tracking_params, since a false match here would drop a real listing.
+TRACKING_PARAMS = r"utm_\w+|gclid|fbclid|msclkid"
+TRACKING_PARAM_PATTERN = re.compile(rf"(?:{TRACKING_PARAMS})", re.IGNORECASE)
+REF_TAIL_PATTERN = re.compile(r"/ref=[^/]*$")
 
 
 def env_int(name: str, default: int, *, min_value: int | None = None, max_value: int | None = None) -> int:
@@ -55,16 +129,33 @@ def env_int(name: str, default: int, *, min_value: int | None = None, max_value:
 
 
 DEFAULT_SETTLE_MS = env_int("DEFAULT_SETTLE_MS", 1600, min_value=500, max_value=10000)
+# Links a priced page must have before it counts as rendered; providers can set min_anchors.
+DEFAULT_MIN_ANCHORS = 20
 NAV_TIMEOUT_MS = env_int("NAV_TIMEOUT_MS", 35000, min_value=10000, max_value=60000)
 WAIT_FOR_SELECTOR_TIMEOUT_MS = env_int("WAIT_FOR_SELECTOR_TIMEOUT_MS", 12000, min_value=2000, max_value=30000)
-MAX_CONCURRENT_PROVIDERS = env_int("MAX_CONCURRENT_PROVIDERS", 6, min_value=1, max_value=16)
+PROVIDER_TIMEOUT_SEC = env_int("PROVIDER_TIMEOUT_SEC", 60, min_value=15, max_value=180)
+CONTEXT_POOL_PER_PROVIDER = env_int("CONTEXT_POOL_PER_PROVIDER", 1, min_value=0, max_value=4)
+CONTEXT_IDLE_SEC = env_int("CONTEXT_IDLE_SEC", 300, min_value=30, max_value=3600)
 MAX_ITEMS_PER_SITE_DEFAULT = env_int("MAX_ITEMS_PER_SITE", 35, min_value=5, max_value=120)
 MAX_QUERY_LENGTH = env_int("MAX_QUERY_LENGTH", 120, min_value=10, max_value=300)
 RATE_LIMIT_PER_MINUTE = env_int("RATE_LIMIT_PER_MINUTE", 30, min_value=1, max_value=120)
 RATE_LIMIT_WINDOW_SEC = 60
+RESULT_CACHE_TTL_SEC = env_int("RESULT_CACHE_TTL_SEC", 120, min_value=0, max_value=3600)
+RESULT_CACHE_SIZE = env_int("RESULT_CACHE_SIZE", 256, min_value=0, max_value=4096)
+PROVIDER_CACHE_TTL_SEC = env_int("PROVIDER_CACHE_TTL_SEC", 60, min_value=0, max_value=3600)
+PROVIDER_FAILURE_TTL_SEC = env_int("PROVIDER_FAILURE_TTL_SEC", 20, min_value=0, max_value=600)
 HEADLESS = os.getenv("PLAYWRIGHT_HEADLESS", "1") != "0"
+STATE_DIR = os.getenv("PLAYWRIGHT_STATE_DIR", ".cache/playwright")
+WARMUP_ON_START = os.getenv("PLAYWRIGHT_WARMUP", "1") != "0"
+WARM_SETTLE_FACTOR = 0.6
+PROGRESS_BATCH_WINDOW_SEC = 0.05
 ALLOWED_SORTS = {"relevance", "price_low", "price_high", "ending_soon"}
-STOPWORDS = {
+FIELD_SORTS = {
+    "price_low": ("price", False),
+    "price_high": ("price", True),
+    "ending_soon": ("auction_end", False),
+}
+STOPWORDS = frozenset({
     "a",
     "an",
     "and",
@@ -82,8 +173,8 @@ STOPWORDS = {
     "the",
     "to",
     "with",
-}
-ACCESSORY_KEYWORDS = {
+})
+ACCESSORY_KEYWORDS = frozenset({
     "adapter",
     "bag",
     "battery",
@@ -117,7 +208,10 @@ ACCESSORY_KEYWORDS = {
     "strap",
     "stylus",
     "travel",
-}
+})
+CONSOLE_WORDS = frozenset({"console", "system", "handheld"})
+SWITCH_LITE_WORDS = frozenset({"switch", "lite"})
+NINTENDO_SWITCH_LITE_WORDS = frozenset({"nintendo", "switch", "lite"})
 
 SEARCH_PROVIDERS: List[Dict[str, Any]] = [
     {
@@ -134,6 +228,13 @@ SEARCH_PROVIDERS: List[Dict[str, Any]] = [
         "name": "eBay",
         "base_url": "https://www.ebay.com",
         "search_url": "https://www.ebay.com/sch/i.html?_nkw={query}",
+        "tracking_params": [r"hash", r"_trk\w+"],
+        "card_selectors": {
+            "card": "li.s-item, li.s-card",
+            "link": 'a[href*="/itm/"]',
+            "title": ".s-item__title, .s-card__title",
+            "price": ".s-item__price, .s-card__price",
+        },
         "product_path_patterns": [r"/itm/"],
     },
     {
@@ -159,6 +260,7 @@ SEARCH_PROVIDERS: List[Dict[str, Any]] = [
         "search_url": "https://www.walmart.com/search?q={query}",
         "wait_for_selector": '[data-automation-id="product-tile"], [data-item-id]',
         "settle_ms": 2600,
+        "tracking_params": [r"ath\w+"],
         "product_path_patterns": [r"/ip/"],
     },
     {
@@ -175,6 +277,16 @@ SEARCH_PROVIDERS: List[Dict[str, Any]] = [
         "name": "Amazon",
         "base_url": "https://www.amazon.com",
         "search_url": "https://www.amazon.com/s?k={query}",
+        "tracking_params": [
+            r"tag", r"qid", r"sr", r"keywords", r"ref_?", r"sprefix", r"crid",
+            r"dib(?:_tag)?", r"pf_rd_\w+", r"pd_rd_\w+",
+        ],
+        "card_selectors": {
+            "card": '[data-component-type="s-search-result"]',
+            "link": 'h2 a[href], a[href*="/dp/"]',
+            "title": "h2",
+            "price": ".a-price .a-offscreen",
+        },
         "product_path_patterns": [r"/dp/", r"/gp/product/"],
     },
     {
@@ -207,6 +319,7 @@ SEARCH_PROVIDERS: List[Dict[str, Any]] = [
         "search_url": "https://www.aliexpress.us/w/wholesale-{query}.html",
         "wait_for_selector": 'a[href*="/item/"]',
         "settle_ms": 3000,
+        "tracking_params": [r"spm"],
         "product_path_patterns": [r"/item/"],
     },
     {
@@ -271,8 +384,89 @@ SEARCH_PROVIDERS: List[Dict[str, Any]] = [
     },
 ]
 
-_rate_limit_lock = threading.Lock()
-_rate_limit_hits: Dict[str, deque[float]] = defaultdict(deque)
+# Each slot is a live browser page, and every gunicorn worker has its own browser and slots.
+# os.cpu_count() reports host cores rather than a container's CPU quota, so the default is fixed.
+MAX_CONCURRENT_PROVIDERS = env_int(
+    "MAX_CONCURRENT_PROVIDERS",
+    6,
+    min_value=1,
+    max_value=len(SEARCH_PROVIDERS),
+)
+
+
+def compile_product_url_pattern(provider: Dict[str, Any]) -> re.Pattern[str] | None:
+    """Joins a provider's product path patterns into one alternation, or None if it has none."""
+    patterns = provider.get("product_path_patterns") or []
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns), re.IGNORECASE)
+
+
+PRODUCT_URL_PATTERNS: Dict[str, re.Pattern[str] | None] = {
+    provider["id"]: compile_product_url_pattern(provider) for provider in SEARCH_PROVIDERS
+}
+
+
+def compile_tracking_param_pattern(provider: Dict[str, Any]) -> re.Pattern[str]:
+    """Matches the universal tracking params plus the provider's own tracking_params."""
+    names = [TRACKING_PARAMS, *provider.get("tracking_params", ())]
+    return re.compile("|".join(f"(?:{name})" for name in names), re.IGNORECASE)
+
+
+TRACKING_PARAM_PATTERNS: Dict[str, re.Pattern[str]] = {
+    provider["id"]: compile_tracking_param_pattern(provider) for provider in SEARCH_PROVIDERS
+}
+
+CONTEXT_OPTIONS: Dict[str, Any] = {
+    "viewport": {"width": 1400, "height": 900},
+    "locale": "en-US",
+    "timezone_id": "America/Chicago",
+    "user_agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/121.0.0.0 Safari/537.36"
+    ),
+    "extra_http_headers": {"Accept-Language": "en-US,en;q=0.9"},
+}
+
+# A comment frame sent before scraping starts, so proxies and browsers that buffer the
+# first couple of KB hand the stream to the page right away.
+SSE_PADDING = b":" + b" " * 2048 + b"\n\n"
+
+# Extraction only reads the DOM (image URLs come from the src attribute), so the bytes behind
+# these are never used. Stylesheets stay: innerText depends on what CSS hides.
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font"})
+# Ad, analytics and tag-manager hosts: none of them render listings, and their scripts keep
+# the network busy long after the results are in the DOM.
+BLOCKED_HOST_PATTERN = re.compile(
+    r"^https?://(?:[^/?#]*\.)?(?:"
+    r"doubleclick\.net|googlesyndication\.com|googleadservices\.com|adservice\.google\.com"
+    r"|googletagmanager\.com|google-analytics\.com|criteo\.(?:com|net)|facebook\.net"
+    r"|hotjar\.com|scorecardresearch\.com|quantserve\.com|taboola\.com|outbrain\.com"
+    r"|adnxs\.com|amazon-adsystem\.com|bat\.bing\.com|clarity\.ms|tiktok\.com/i18n/pixel"
+    r")(?:[:/?#]|$)",
+    re.IGNORECASE,
+)
+
+_scrape_loop: asyncio.AbstractEventLoop | None = None
+_scrape_loop_lock = threading.Lock()
+_browser_lock = asyncio.Lock()
+_provider_slots = asyncio.Semaphore(MAX_CONCURRENT_PROVIDERS)
+_playwright = None
+_browser = None
+_inflight_scrapes: Dict[tuple, list] = {}
+_idle_contexts: Dict[str, List[tuple[Any, float]]] = defaultdict(list)
+_idle_sweeper: Future | None = None
+
+_result_cache = TTLCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL_SEC)
+_page_cache = TTLCache(min(RESULT_CACHE_SIZE, 32), RESULT_CACHE_TTL_SEC)
+_provider_cache = TTLCache(1024, PROVIDER_CACHE_TTL_SEC)
+# Recent timeout/error statuses, so a repeat search doesn't wait on a failing provider again.
+_provider_failures = TTLCache(1024, PROVIDER_FAILURE_TTL_SEC)
+
+_rate_limit_locks = [threading.Lock() for _ in range(16)]
+_rate_limit_windows: Dict[str, tuple[int, int, int]] = {}
+_rate_limit_swept_at = 0.0
 
 
 def client_ip() -> str:
@@ -282,22 +476,50 @@ def client_ip() -> str:
     return request.remote_addr or "unknown"
 
 
+def rate_limit_lock(ip: str) -> threading.Lock:
+    return _rate_limit_locks[hash(ip) % len(_rate_limit_locks)]
+
+
 def is_rate_limited(ip: str) -> bool:
+    """
+    Sliding-window counter per IP: the previous window's count is weighted by how much of it
+    still overlaps the last RATE_LIMIT_WINDOW_SEC, so bursts across a window edge are capped too.
+    """
     if RATE_LIMIT_PER_MINUTE <= 0:
         return False
-    now = time.time()
-    with _rate_limit_lock:
-        window = _rate_limit_hits[ip]
-        while window and (now - window[0]) > RATE_LIMIT_WINDOW_SEC:
-            window.popleft()
-        if len(window) >= RATE_LIMIT_PER_MINUTE:
-            return True
-        window.append(now)
-    return False
+    now = time.monotonic()
+    window, offset = divmod(now, RATE_LIMIT_WINDOW_SEC)
+    window = int(window)
+    with rate_limit_lock(ip):
+        last_window, previous, current = _rate_limit_windows.get(ip, (window, 0, 0))
+        if window != last_window:
+            previous = current if window == last_window + 1 else 0
+            current = 0
+        weighted = previous * (1 - offset / RATE_LIMIT_WINDOW_SEC) + current
+        limited = weighted + 1 > RATE_LIMIT_PER_MINUTE
+        _rate_limit_windows[ip] = (window, previous, current if limited else current + 1)
+    sweep_rate_limit_windows(now)
+    return limited
+
+
+def sweep_rate_limit_windows(now: float) -> None:
+    """Once per window, drops IPs whose counters have both aged out; a missing entry counts as zero."""
+    global _rate_limit_swept_at
+    if now - _rate_limit_swept_at < RATE_LIMIT_WINDOW_SEC:
+        return
+    _rate_limit_swept_at = now
+    stale_before = int(now // RATE_LIMIT_WINDOW_SEC) - 1
+    for ip, (window, _, _) in list(_rate_limit_windows.items()):
+        if window >= stale_before:
+            continue
+        with rate_limit_lock(ip):
+            entry = _rate_limit_windows.get(ip)
+            if entry is not None and entry[0] < stale_before:
+                del _rate_limit_windows[ip]
 
 
 def normalize_query(raw: str) -> str:
-    normalized = re.sub(r"\s+", " ", raw).strip()
+    normalized = WHITESPACE_PATTERN.sub(" ", raw).strip()
     return normalized[:MAX_QUERY_LENGTH]
 
 
@@ -324,6 +546,7 @@ def add_security_headers(response):
     return response
 
 
+@lru_cache(maxsize=4096)
 def parse_price_to_float(price_text: str) -> Optional[float]:
     """
     Extracts the first $price-looking thing from text and converts it to float.
@@ -335,15 +558,15 @@ def parse_price_to_float(price_text: str) -> Optional[float]:
     if not match:
         return None
 
-    dollars_part = match.group(1).replace(",", "")
+    dollars = int(match.group(1).replace(",", ""))
     cents_part = match.group(2)
+    cents = int(cents_part) if cents_part else 0
 
-    if cents_part is None:
-        cents_part = "00"
-
-    return float(f"{dollars_part}.{cents_part}")
+    # Both operands are exact integers, so the division rounds the same way float("D.CC") would.
+    return (dollars * 100 + cents) / 100
 
 
+@lru_cache(maxsize=8192)
 def normalize_url(href: str, base_url: str) -> str:
     if href.startswith("http://") or href.startswith("https://"):
         return href
@@ -352,125 +575,177 @@ def normalize_url(href: str, base_url: str) -> str:
     return f"{base_url}/{href}"
 
 
+@lru_cache(maxsize=8192)
+def canonical_url(url: str, tracking_pattern: re.Pattern[str] = TRACKING_PARAM_PATTERN) -> str:
+    """Dedupe key for a listing URL: lowercase host, no fragment, tracking params or Amazon /ref= tail."""
+    parts = urlsplit(url)
+    query = "&".join(
+        pair for pair in parts.query.split("&")
+        if pair and not tracking_pattern.fullmatch(pair.split("=", 1)[0])
+    )
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), REF_TAIL_PATTERN.sub("", parts.path), query, ""))
+
+
 def tokenize(text: str) -> List[str]:
-    return re.findall(r"[a-z0-9]+", text.lower())
+    if text.isascii():
+        return text.encode().translate(TOKEN_TRANSLATION).decode().split()
+    return TOKEN_PATTERN.findall(text.lower())
 
 
-def query_tokens(query: str) -> List[str]:
-    return [token for token in tokenize(query) if len(token) > 1 and token not in STOPWORDS]
+@lru_cache(maxsize=256)
+def query_tokens(query: str) -> tuple[str, ...]:
+    return tuple(token for token in tokenize(query) if len(token) > 1 and token not in STOPWORDS)
 
 
-def is_relevant_name(name: str, tokens: List[str]) -> bool:
-    if not tokens:
-        return True
-    name_tokens = set(tokenize(name))
-    if not name_tokens:
-        return False
-    return bool(name_tokens.intersection(tokens))
+@lru_cache(maxsize=4096)
+def name_tokens(name: str) -> frozenset[str]:
+    """
+    Token set for a product name, memoized because the same listings come back
+    on every re-sort and repeated search.
+    """
+    return frozenset(tokenize(name))
 
 
-def accessory_penalty(name_tokens: set[str], tokens: List[str]) -> int:
-    if not tokens:
-        return 0
-    accessory_hits = name_tokens.intersection(ACCESSORY_KEYWORDS)
-    if not accessory_hits:
+@lru_cache(maxsize=256)
+def relevance_pattern(tokens: tuple[str, ...]) -> re.Pattern[str]:
+    """
+    Matches any query token as a whole token of a lowercased name, i.e. bounded by
+    the same [a-z0-9] runs tokenize() splits on, without building a token set per name.
+    """
+    alternation = "|".join(re.escape(token) for token in tokens)
+    return re.compile(rf"(?<![a-z0-9])(?:{alternation})(?![a-z0-9])")
+
+
+def accessory_penalty(name_tokens: frozenset[str], query_accessories: frozenset[str]) -> int:
+    if name_tokens.isdisjoint(ACCESSORY_KEYWORDS):
         return 0
-    if accessory_hits.intersection(tokens):
+    # query_accessories is a subset of ACCESSORY_KEYWORDS, so this tests the accessory hits.
+    if not name_tokens.isdisjoint(query_accessories):
         return 0
     return 1
 
 
-def console_boost(name_tokens: set[str], tokens: List[str]) -> int:
-    if not {"switch", "lite"}.issubset(tokens):
+def console_boost(name_tokens: frozenset[str], wants_console: bool) -> int:
+    if not wants_console:
         return 0
-    if {"console", "system", "handheld"}.intersection(name_tokens):
+    if not name_tokens.isdisjoint(CONSOLE_WORDS):
         return 1
-    if {"nintendo", "switch", "lite"}.issubset(name_tokens):
+    if NINTENDO_SWITCH_LITE_WORDS.issubset(name_tokens):
         return 1
     return 0
 
 
-def relevance_sort_key(name: str, tokens: List[str], query: str) -> tuple[int, int, int, int, int]:
-    if not tokens:
-        return (0, 0, 0, 0, 0)
-    name_lower = name.lower()
-    name_tokens = set(tokenize(name))
-    match_count = sum(1 for token in tokens if token in name_tokens)
-    exact_phrase = 1 if query.lower() in name_lower else 0
-    missing = len(tokens) - match_count
-    boost = console_boost(name_tokens, tokens)
-    penalty = accessory_penalty(name_tokens, tokens)
-    return (exact_phrase, match_count, missing, boost, penalty)
-
-
-def is_product_url(url: str, provider: Dict[str, Any]) -> bool:
-    patterns = provider.get("product_path_patterns") or []
-    if not patterns:
-        return True
-    return any(re.search(pattern, url, re.IGNORECASE) for pattern in patterns)
-
-
-def extract_products_from_dom(page) -> List[Dict[str, Any]]:
+def make_relevance_key(tokens: tuple[str, ...], query_lower: str) -> Callable[[Product], tuple]:
     """
-    Extract products by scanning links and pulling name + price from a nearby container.
-    The selector intentionally avoids brittle class names to survive UI changes.
+    Builds the relevance sort key for one query. Everything that depends only on the query
+    (accessory words it names, whether it asks for a Switch Lite) is resolved here, and the
+    key is already in ascending order, so each product costs one call and one tuple.
     """
-    extraction_script = r"""
-    () => {
-      const priceRegex = /\$\s*\d[\d,]*(?:\.\d{2})?/;
-      const links = Array.from(document.querySelectorAll('a[href]'));
+    if not tokens:
+        return lambda product: (product.price is None, product.price or 10**12)
+    query_accessories = ACCESSORY_KEYWORDS.intersection(tokens)
+    wants_console = SWITCH_LITE_WORDS.issubset(tokens)
+
+    def relevance_key(product: Product) -> tuple:
+        name = product.name
+        price = product.price
+        tokens_in_name = name_tokens(name)
+        return (
+            query_lower not in name.lower(),
+            -sum(map(tokens_in_name.__contains__, tokens)),
+            -console_boost(tokens_in_name, wants_console),
+            accessory_penalty(tokens_in_name, query_accessories),
+            price is None,
+            price or 10**12,
+        )
 
-      const results = [];
-      const seen = new Set();
+    return relevance_key
 
-      for (const link of links) {
-        const href = link.getAttribute('href');
-        if (!href) continue;
-
-        let container = link;
-        let containerText = '';
-        for (let i = 0; i < 7; i++) {
-          if (!container || !container.parentElement) break;
-          containerText = (container.innerText || '').trim();
-          if (priceRegex.test(containerText)) break;
-          container = container.parentElement;
-        }
 
-        if (!priceRegex.test(containerText)) continue;
+EXTRACTION_SCRIPT = r"""
+window.__df = (() => {
+  const priceRegex = /\$\s*\d[\d,]*(?:\.\d{2})?/;
 
-        let name = (link.innerText || '').trim();
-        if (!name) {
-          const img = link.querySelector('img[alt]') || (container ? container.querySelector('img[alt]') : null);
-          if (img && img.getAttribute('alt')) name = img.getAttribute('alt').trim();
-        }
-        let imageUrl = '';
-        const imgTag = link.querySelector('img') || (container ? container.querySelector('img') : null);
-        if (imgTag && imgTag.getAttribute('src')) imageUrl = imgTag.getAttribute('src');
+  // Walks up from each matching link until a container mentions a price.
+  const linkWalk = (linkSelector) => {
+    const links = Array.from(document.querySelectorAll(linkSelector));
+    const results = [];
+    const seen = new Set();
 
-        const priceMatch = containerText.match(priceRegex);
-        const priceText = priceMatch ? priceMatch[0] : '';
+    for (const link of links) {
+      const href = link.getAttribute('href');
+      if (!href) continue;
 
-        const key = href + '|' + name + '|' + priceText;
-        if (seen.has(key)) continue;
-        seen.add(key);
+      let container = link;
+      let containerText = '';
+      for (let i = 0; i < 7; i++) {
+        if (!container || !container.parentElement) break;
+        containerText = (container.innerText || '').trim();
+        if (priceRegex.test(containerText)) break;
+        container = container.parentElement;
+      }
 
-        results.push({
-          href,
-          name,
-          priceText,
-          imageUrl,
-        });
+      if (!priceRegex.test(containerText)) continue;
+
+      let name = (link.innerText || '').trim();
+      if (!name) {
+        const img = link.querySelector('img[alt]') || (container ? container.querySelector('img[alt]') : null);
+        if (img && img.getAttribute('alt')) name = img.getAttribute('alt').trim();
       }
+      let imageUrl = '';
+      const imgTag = link.querySelector('img') || (container ? container.querySelector('img') : null);
+      if (imgTag && imgTag.getAttribute('src')) imageUrl = imgTag.getAttribute('src');
 
-      return results;
+      const priceMatch = containerText.match(priceRegex);
+      const priceText = priceMatch ? priceMatch[0] : '';
+
+      const key = href + '|' + name + '|' + priceText;
+      if (seen.has(key)) continue;
+      seen.add(key);
+
+      results.push({ href, name, priceText, imageUrl });
+    }
+
+    return results;
+  };
+
+  // Reads name + price from each result card matched by a provider's card_selectors.
+  const cards = (spec) => {
+    const items = Array.from(document.querySelectorAll(spec.card));
+    const results = [];
+    const seen = new Set();
+
+    for (const item of items) {
+      const link = item.querySelector(spec.link);
+      if (!link) continue;
+      const title = spec.title ? item.querySelector(spec.title) : null;
+      const price = item.querySelector(spec.price);
+
+      const href = link.getAttribute('href') || '';
+      const name = ((title ? title.innerText : '') || link.innerText || '').trim();
+      const priceText = (price ? (price.innerText || price.textContent) : '').trim();
+      const image = item.querySelector('img');
+      const imageUrl = image ? (image.getAttribute('src') || '') : '';
+
+      const key = href + '|' + name + '|' + priceText;
+      if (seen.has(key)) continue;
+      seen.add(key);
+
+      results.push({ href, name, priceText, imageUrl });
     }
-    """
-    return page.evaluate(extraction_script)
 
+    return results;
+  };
 
-def extract_newegg_products(page) -> List[Dict[str, Any]]:
-    extraction_script = r"""
-    () => {
+  return {
+    generic: () => linkWalk('a[href]'),
+
+    cards: (spec) => {
+      const results = cards(spec);
+      return results.length ? results : linkWalk('a[href]');
+    },
+
+    newegg: () => {
       const items = Array.from(document.querySelectorAll('.item-cell'));
       const results = [];
       const seen = new Set();
@@ -494,14 +769,9 @@ def extract_newegg_products(page) -> List[Dict[str, Any]]:
       }
 
       return results;
-    }
-    """
-    return page.evaluate(extraction_script)
-
+    },
 
-def extract_walmart_products(page) -> List[Dict[str, Any]]:
-    extraction_script = r"""
-    () => {
+    walmart: () => {
       const items = Array.from(
         document.querySelectorAll(
           '[data-automation-id="product-tile"], [data-item-id], [data-testid="item-stack"]'
@@ -535,51 +805,10 @@ def extract_walmart_products(page) -> List[Dict[str, Any]]:
         return results;
       }
 
-      const priceRegex = /\$\s*\d[\d,]*(?:\.\d{2})?/;
-      const links = Array.from(document.querySelectorAll('a[href*="/ip/"]'));
-      for (const link of links) {
-        const href = link.getAttribute('href');
-        if (!href) continue;
-
-        let container = link;
-        let containerText = '';
-        for (let i = 0; i < 7; i++) {
-          if (!container || !container.parentElement) break;
-          containerText = (container.innerText || '').trim();
-          if (priceRegex.test(containerText)) break;
-          container = container.parentElement;
-        }
-
-        if (!priceRegex.test(containerText)) continue;
-
-        let name = (link.innerText || '').trim();
-        if (!name) {
-          const img = link.querySelector('img[alt]') || (container ? container.querySelector('img[alt]') : null);
-          if (img && img.getAttribute('alt')) name = img.getAttribute('alt').trim();
-        }
-        let imageUrl = '';
-        const imgTag = link.querySelector('img') || (container ? container.querySelector('img') : null);
-        if (imgTag && imgTag.getAttribute('src')) imageUrl = imgTag.getAttribute('src');
-
-        const priceMatch = containerText.match(priceRegex);
-        const priceText = priceMatch ? priceMatch[0] : '';
-
-        const key = href + '|' + name + '|' + priceText;
-        if (seen.has(key)) continue;
-        seen.add(key);
-
-        results.push({ href, name, priceText, imageUrl });
-      }
-
-      return results;
-    }
-    """
-    return page.evaluate(extraction_script)
-
+      return linkWalk('a[href*="/ip/"]');
+    },
 
-def extract_bestbuy_products(page) -> List[Dict[str, Any]]:
-    extraction_script = r"""
-    () => {
+    bestbuy: () => {
       const items = Array.from(document.querySelectorAll('.sku-item'));
       const results = [];
       const seen = new Set();
@@ -603,14 +832,9 @@ def extract_bestbuy_products(page) -> List[Dict[str, Any]]:
       }
 
       return results;
-    }
-    """
-    return page.evaluate(extraction_script)
-
+    },
 
-def extract_slickdeals_products(page) -> List[Dict[str, Any]]:
-    extraction_script = r"""
-    () => {
+    slickdeals: () => {
       const items = Array.from(
         document.querySelectorAll(
           '.dealCard, .resultRow, .dp-p, .searchResult, [data-threadid], [data-id]'
@@ -644,52 +868,10 @@ def extract_slickdeals_products(page) -> List[Dict[str, Any]]:
         return results;
       }
 
-      const priceRegex = /\$\s*\d[\d,]*(?:\.\d{2})?/;
-      const links = Array.from(document.querySelectorAll('a[href*="/f/"], a[href*="/deal/"]'));
-
-      for (const link of links) {
-        const href = link.getAttribute('href');
-        if (!href) continue;
-
-        let container = link;
-        let containerText = '';
-        for (let i = 0; i < 7; i++) {
-          if (!container || !container.parentElement) break;
-          containerText = (container.innerText || '').trim();
-          if (priceRegex.test(containerText)) break;
-          container = container.parentElement;
-        }
-
-        if (!priceRegex.test(containerText)) continue;
-
-        let name = (link.innerText || '').trim();
-        if (!name) {
-          const img = link.querySelector('img[alt]') || (container ? container.querySelector('img[alt]') : null);
-          if (img && img.getAttribute('alt')) name = img.getAttribute('alt').trim();
-        }
-        let imageUrl = '';
-        const imgTag = link.querySelector('img') || (container ? container.querySelector('img') : null);
-        if (imgTag && imgTag.getAttribute('src')) imageUrl = imgTag.getAttribute('src');
-
-        const priceMatch = containerText.match(priceRegex);
-        const priceText = priceMatch ? priceMatch[0] : '';
-
-        const key = href + '|' + name + '|' + priceText;
-        if (seen.has(key)) continue;
-        seen.add(key);
-
-        results.push({ href, name, priceText, imageUrl });
-      }
-
-      return results;
-    }
-    """
-    return page.evaluate(extraction_script)
-
+      return linkWalk('a[href*="/f/"], a[href*="/deal/"]');
+    },
 
-def extract_pawnamerica_products(page) -> List[Dict[str, Any]]:
-    extraction_script = r"""
-    () => {
+    pawnamerica: () => {
       const cards = Array.from(document.querySelectorAll('.ps-product'));
       const results = [];
       const seen = new Set();
@@ -714,9 +896,33 @@ def extract_pawnamerica_products(page) -> List[Dict[str, Any]]:
       }
 
       return results;
-    }
+    },
+  };
+})();
+"""
+
+
+CONTENT_READY_SCRIPT = r"""
+(minAnchors) => document.body !== null
+  && document.querySelectorAll('a[href]').length > minAnchors
+  && /\$\s*\d/.test(document.body.innerText)
+"""
+
+
+# Providers with a dedicated extractor in the window.__df bundle. Providers with card_selectors
+# use "cards", the rest "generic".
+EXTRACTOR_KINDS = frozenset({"pawnamerica", "newegg", "walmart", "bestbuy", "slickdeals"})
+# An empty first pass usually means late-rendering results; look once more after a pause.
+EXTRACT_RETRY_DELAYS_MS = (0, 1400)
+
+
+async def extract_products(page, kind: str, spec: Dict[str, str] | None = None) -> List[Dict[str, Any]]:
+    """
+    Runs one extractor from the init-script bundle. "generic" scans links and pulls name + price
+    from a nearby container, avoiding brittle class names to survive UI changes. "cards" reads
+    the result cards named by spec and falls back to the generic scan when none match.
     """
-    return page.evaluate(extraction_script)
+    return await page.evaluate("([kind, spec]) => window.__df[kind](spec)", [kind, spec])
 
 
 def coerce_products(
@@ -730,7 +936,12 @@ def coerce_products(
 ) -> List[Product]:
     products: List[Product] = []
     seen_urls = set()
+    # Resolve the query- and provider-level matchers once, not per raw item.
     tokens = query_tokens(query)
+    relevance_search = relevance_pattern(tokens).search if tokens else None
+    url_pattern = PRODUCT_URL_PATTERNS[provider["id"]]
+    tracking_pattern = TRACKING_PARAM_PATTERNS[provider["id"]]
+    url_search = url_pattern.search if url_pattern is not None else None
 
     for item in raw_items:
         href = (item.get("href") or "").strip()
@@ -738,24 +949,25 @@ def coerce_products(
             continue
 
         full_url = normalize_url(href, base_url)
-        if full_url in seen_urls:
+        url_key = canonical_url(full_url, tracking_pattern)
+        if url_key in seen_urls:
             continue
-        seen_urls.add(full_url)
+        seen_urls.add(url_key)
 
-        if not is_product_url(full_url, provider):
+        if url_search is not None and url_search(full_url) is None:
             continue
 
         name = (item.get("name") or "").strip()
-        price_text = (item.get("priceText") or "").strip()
-        image_url = (item.get("imageUrl") or "").strip() or None
-        price = parse_price_to_float(price_text) if price_text else None
-
         if not name:
             continue
-        if not is_relevant_name(name, tokens):
+        if relevance_search is not None and relevance_search(name.lower()) is None:
             continue
+
+        price_text = (item.get("priceText") or "").strip()
+        price = parse_price_to_float(price_text) if price_text else None
         if price is not None and price <= 0:
             continue
+        image_url = (item.get("imageUrl") or "").strip() or None
 
         products.append(Product(
             name=name,
@@ -770,55 +982,76 @@ def coerce_products(
     return products
 
 
-def scrape_provider_page(
+async def wait_for_selector_or_idle(page, selector: str) -> bool:
+    """
+    Races the provider's result selector against network idle and returns whether the selector
+    matched. A page that goes quiet without it (changed markup, no results) stops the wait there
+    instead of running out the whole selector timeout.
+    """
+    selector_wait = asyncio.ensure_future(page.wait_for_selector(selector, timeout=WAIT_FOR_SELECTOR_TIMEOUT_MS))
+    idle_wait = asyncio.ensure_future(page.wait_for_load_state("networkidle", timeout=WAIT_FOR_SELECTOR_TIMEOUT_MS))
+    try:
+        await asyncio.wait((selector_wait, idle_wait), return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for waiter in (selector_wait, idle_wait):
+            waiter.cancel()
+        await asyncio.gather(selector_wait, idle_wait, return_exceptions=True)
+    return not selector_wait.cancelled() and selector_wait.exception() is None
+
+
+async def scrape_provider_page(
     page,
     provider: Dict[str, Any],
     query: str,
     *,
     max_items: int,
     include_auctions: bool,
+    encoded_query: str | None = None,
+    warm_state: bool = False,
 ) -> List[Product]:
     base_url = provider["base_url"]
-    search_url = provider["search_url"].format(query=quote_plus(query))
+    if encoded_query is None:
+        encoded_query = quote_plus(query)
+    search_url = provider["search_url"].format(query=encoded_query)
     if provider.get("id") == "ebay" and not include_auctions:
         search_url = f"{search_url}&LH_BIN=1&LH_Auction=0"
 
-    page.goto(search_url, wait_until="domcontentloaded", timeout=NAV_TIMEOUT_MS)
+    # Readiness is judged from the DOM below, so start watching as soon as the response commits.
+    await page.goto(search_url, wait_until="commit", timeout=NAV_TIMEOUT_MS)
+    selector_ready = False
     wait_for_selector = provider.get("wait_for_selector")
     if wait_for_selector:
+        selector_ready = await wait_for_selector_or_idle(page, wait_for_selector)
+    if not selector_ready:
+        # settle_ms is now only a cap: stop waiting as soon as priced links are on the page.
+        settle_ms = provider.get("settle_ms", DEFAULT_SETTLE_MS)
+        if warm_state:
+            settle_ms = int(settle_ms * WARM_SETTLE_FACTOR)
         try:
-            page.wait_for_selector(wait_for_selector, timeout=WAIT_FOR_SELECTOR_TIMEOUT_MS)
+            await page.wait_for_function(
+                CONTENT_READY_SCRIPT,
+                arg=provider.get("min_anchors", DEFAULT_MIN_ANCHORS),
+                timeout=settle_ms,
+                polling=250,
+            )
         except TimeoutError:
             pass
-    page.wait_for_timeout(provider.get("settle_ms", DEFAULT_SETTLE_MS))
-
-    provider_id = provider.get("id")
-    if provider_id == "pawnamerica":
-        raw_items = extract_pawnamerica_products(page)
-    elif provider_id == "newegg":
-        raw_items = extract_newegg_products(page)
-    elif provider_id == "walmart":
-        raw_items = extract_walmart_products(page)
-    elif provider_id == "bestbuy":
-        raw_items = extract_bestbuy_products(page)
-    elif provider_id == "slickdeals":
-        raw_items = extract_slickdeals_products(page)
+    # Either signal can fire while server-rendered results are still streaming in.
+    await page.wait_for_load_state("domcontentloaded", timeout=NAV_TIMEOUT_MS)
+
+    card_selectors = provider.get("card_selectors")
+    if provider.get("id") in EXTRACTOR_KINDS:
+        kind = provider["id"]
+    elif card_selectors:
+        kind = "cards"
     else:
-        raw_items = extract_products_from_dom(page)
-    if not raw_items:
-        page.wait_for_timeout(1400)
-        if provider_id == "pawnamerica":
-            raw_items = extract_pawnamerica_products(page)
-        elif provider_id == "newegg":
-            raw_items = extract_newegg_products(page)
-        elif provider_id == "walmart":
-            raw_items = extract_walmart_products(page)
-        elif provider_id == "bestbuy":
-            raw_items = extract_bestbuy_products(page)
-        elif provider_id == "slickdeals":
-            raw_items = extract_slickdeals_products(page)
-        else:
-            raw_items = extract_products_from_dom(page)
+        kind = "generic"
+    for delay_ms in EXTRACT_RETRY_DELAYS_MS:
+        if delay_ms:
+            await page.wait_for_timeout(delay_ms)
+        raw_items = await extract_products(page, kind, card_selectors)
+        if raw_items:
+            break
     return coerce_products(
         raw_items,
         base_url=base_url,
@@ -829,88 +1062,417 @@ def scrape_provider_page(
     )
 
 
-def scrape_provider_standalone(
+def get_scrape_loop() -> asyncio.AbstractEventLoop:
+    """
+    Returns the event loop that drives every scrape, starting its thread on first use.
+    One loop owns one Playwright driver and browser, so providers run as coroutines
+    instead of tying up an OS thread (and a driver process) each.
+    """
+    global _scrape_loop, _idle_sweeper
+    with _scrape_loop_lock:
+        if _scrape_loop is None:
+            loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="scrape-loop", daemon=True).start()
+            _idle_sweeper = asyncio.run_coroutine_threadsafe(sweep_idle_contexts(), loop)
+            _scrape_loop = loop
+    return _scrape_loop
+
+
+async def get_browser():
+    global _playwright, _browser
+    async with _browser_lock:
+        if _browser is None or not _browser.is_connected():
+            if _playwright is None:
+                _playwright = await async_playwright().start()
+            _browser = await _playwright.chromium.launch(headless=HEADLESS)
+            logger.info("launched shared browser")
+    return _browser
+
+
+async def close_browser() -> None:
+    global _playwright, _browser
+    if _browser is not None:
+        await _browser.close()
+        _browser = None
+    _idle_contexts.clear()
+    if _playwright is not None:
+        await _playwright.stop()
+        _playwright = None
+
+
+@atexit.register
+def shutdown_scrape_loop() -> None:
+    if _scrape_loop is None:
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(close_browser(), _scrape_loop).result(timeout=10)
+    except Exception:
+        logger.warning("browser shutdown failed", exc_info=True)
+    _scrape_loop.call_soon_threadsafe(_scrape_loop.stop)
+
+
+def storage_state_path(provider: Dict[str, Any]) -> str | None:
+    if not STATE_DIR:
+        return None
+    return os.path.join(STATE_DIR, f"state_{provider['id']}.json")
+
+
+async def open_provider_context(browser, provider: Dict[str, Any]):
+    """
+    Opens a context for one provider, seeded with the cookies/storage saved by its last
+    successful scrape so consent and geolocation banners don't have to render again.
+    Returns the context and whether saved state was loaded.
+    """
+    state_path = storage_state_path(provider)
+    if state_path and os.path.exists(state_path):
+        try:
+            return await browser.new_context(**CONTEXT_OPTIONS, storage_state=state_path), True
+        except (PlaywrightError, ValueError, OSError):
+            logger.warning("discarding unreadable browser state: %s", state_path)
+            # Another worker may have hit the same bad file and removed it first.
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(state_path)
+    return await browser.new_context(**CONTEXT_OPTIONS), False
+
+
+async def save_provider_state(context, provider: Dict[str, Any]) -> None:
+    state_path = storage_state_path(provider)
+    if not state_path:
+        return
+    state = await context.storage_state()
+    temp_path = f"{state_path}.{os.getpid()}.{id(context)}.tmp"
+    # Keep the disk write off the scrape loop, which every provider shares.
+    await asyncio.to_thread(write_state_file, state_path, state, temp_path)
+
+
+def write_state_file(state_path: str, state: Dict[str, Any], temp_path: str) -> None:
+    try:
+        os.makedirs(STATE_DIR, exist_ok=True)
+        with open(temp_path, "w", encoding="utf-8") as file_handle:
+            json.dump(state, file_handle)
+        os.replace(temp_path, state_path)
+    except OSError:
+        logger.warning("could not save browser state: %s", state_path, exc_info=True)
+
+
+async def block_unneeded_requests(route) -> None:
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or BLOCKED_HOST_PATTERN.match(request.url):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def acquire_provider_context(browser, provider: Dict[str, Any]):
+    """
+    Returns (context, warm) for one provider: an idle pooled context from the same browser if
+    one is fresh enough, otherwise a new one with the extraction bundle and request filter installed.
+    """
+    idle = _idle_contexts[provider["id"]]
+    while idle:
+        context, released_at = idle.pop()
+        if context.browser is browser and time.monotonic() - released_at < CONTEXT_IDLE_SEC:
+            return context, True
+        try:
+            await context.close()
+        except PlaywrightError:
+            pass
+    context, warm_state = await open_provider_context(browser, provider)
+    await context.add_init_script(EXTRACTION_SCRIPT)
+    await context.route("**/*", block_unneeded_requests)
+    return context, warm_state
+
+
+async def release_provider_context(context, provider: Dict[str, Any], *, reusable: bool) -> None:
+    idle = _idle_contexts[provider["id"]]
+    if reusable and len(idle) < CONTEXT_POOL_PER_PROVIDER:
+        idle.append((context, time.monotonic()))
+    else:
+        await context.close()
+
+
+async def sweep_idle_contexts() -> None:
+    """
+    Periodically closes pooled contexts idle past CONTEXT_IDLE_SEC, so providers that aren't
+    searched again don't keep theirs open for the life of the worker.
+    """
+    while True:
+        await asyncio.sleep(CONTEXT_IDLE_SEC / 2)
+        cutoff = time.monotonic() - CONTEXT_IDLE_SEC
+        expired = []
+        for idle in _idle_contexts.values():
+            expired.extend(context for context, released_at in idle if released_at <= cutoff)
+            idle[:] = [entry for entry in idle if entry[1] > cutoff]
+        for context in expired:
+            try:
+                await context.close()
+            except PlaywrightError:
+                pass
+
+
+async def scrape_provider_async(
     provider: Dict[str, Any],
     query: str,
     *,
     max_items: int,
     include_auctions: bool,
+    encoded_query: str | None = None,
 ) -> tuple[Dict[str, Any], List[Product], str]:
     status = "ok"
     products: List[Product] = []
-    with sync_playwright() as playwright:
-        browser = playwright.chromium.launch(headless=HEADLESS)
-        context = browser.new_context(
-            viewport={"width": 1400, "height": 900},
-            locale="en-US",
-            timezone_id="America/Chicago",
-            user_agent=(
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/121.0.0.0 Safari/537.36"
-            ),
-            extra_http_headers={"Accept-Language": "en-US,en;q=0.9"},
-        )
-        page = context.new_page()
+    async with _provider_slots:
+        context = None
+        reusable = False
         try:
-            products = scrape_provider_page(
-                page,
-                provider,
-                query,
-                max_items=max_items,
-                include_auctions=include_auctions,
-            )
-        except TimeoutError:
+            async with asyncio.timeout(PROVIDER_TIMEOUT_SEC):
+                browser = await get_browser()
+                context, warm_state = await acquire_provider_context(browser, provider)
+                page = await context.new_page()
+                products = await scrape_provider_page(
+                    page,
+                    provider,
+                    query,
+                    max_items=max_items,
+                    include_auctions=include_auctions,
+                    encoded_query=encoded_query,
+                    warm_state=warm_state,
+                )
+                await page.close()
+                reusable = True
+                if products:
+                    await save_provider_state(context, provider)
+        except (TimeoutError, asyncio.TimeoutError):
             status = "timeout"
             logger.warning("provider timeout: %s", provider.get("name"))
         except Exception:
             status = "error"
             logger.exception("provider error: %s", provider.get("name"))
         finally:
-            page.close()
-            context.close()
-            browser.close()
+            if context is not None:
+                await release_provider_context(context, provider, reusable=reusable)
     return provider, products, status
 
 
-def sort_products(products: List[Product], query: str, sort_by: str) -> List[Product]:
-    if sort_by == "price_high":
-        return sorted(
-            products,
-            key=lambda p: (p.price is None, -(p.price or 0)),
-        )
-    if sort_by == "price_low":
-        return sorted(
-            products,
-            key=lambda p: (p.price is None, p.price if p.price is not None else 10**12),
-        )
-    if sort_by == "ending_soon":
-        return sorted(
-            products,
-            key=lambda p: (p.auction_end is None, p.auction_end or 10**18),
+async def scrape_provider_shared(
+    provider: Dict[str, Any],
+    query: str,
+    *,
+    max_items: int,
+    include_auctions: bool,
+    encoded_query: str | None = None,
+) -> tuple[Dict[str, Any], List[Product], str]:
+    """
+    Serves a provider's recent non-empty result or recent failure from cache, or joins an
+    identical scrape already in flight instead of starting another one. The shared scrape is only cancelled
+    once every caller waiting on it has been cancelled.
+    Runs on the scrape loop only, so the in-flight bookkeeping needs no lock.
+    """
+    key = (provider["id"], query, max_items, include_auctions)
+    cached = _provider_cache.get(key)
+    if cached is not None:
+        return provider, list(cached), "ok"
+    failed_status = _provider_failures.get(key)
+    if failed_status is not None:
+        return provider, [], failed_status
+    entry = _inflight_scrapes.get(key)
+    if entry is None:
+        task = asyncio.ensure_future(
+            scrape_provider_async(
+                provider,
+                query,
+                max_items=max_items,
+                include_auctions=include_auctions,
+                encoded_query=encoded_query,
+            )
         )
-    tokens = query_tokens(query)
-    def sort_key(product: Product) -> tuple:
-        exact_phrase, match_count, missing, boost, penalty = relevance_sort_key(
-            product.name,
-            tokens,
+        entry = _inflight_scrapes[key] = [task, 0]
+
+        def finish(task, entry=entry):
+            if _inflight_scrapes.get(key) is entry:
+                del _inflight_scrapes[key]
+            if not task.cancelled() and task.exception() is None:
+                _, products, status = task.result()
+                # An empty "ok" is often a bot wall or an early extraction; let the next search retry.
+                if status == "ok" and products:
+                    _provider_cache.set(key, tuple(products))
+                elif status != "ok":
+                    _provider_failures.set(key, status)
+
+        task.add_done_callback(finish)
+    task = entry[0]
+    entry[1] += 1
+    try:
+        return await asyncio.shield(task)
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0 and not task.done():
+            if _inflight_scrapes.get(key) is entry:
+                del _inflight_scrapes[key]
+            task.cancel()
+
+
+def submit_scrape(
+    provider: Dict[str, Any],
+    query: str,
+    *,
+    max_items: int,
+    include_auctions: bool,
+    encoded_query: str | None = None,
+) -> Future:
+    return asyncio.run_coroutine_threadsafe(
+        scrape_provider_shared(
+            provider,
             query,
-        )
-        return (
-            -exact_phrase,
-            -match_count,
-            missing,
-            -boost,
-            penalty,
-            product.price is None,
-            product.price or 10**12,
-        )
-    return sorted(
-        products,
-        key=sort_key,
+            max_items=max_items,
+            include_auctions=include_auctions,
+            encoded_query=encoded_query,
+        ),
+        get_scrape_loop(),
     )
 
 
+def scrape_provider_standalone(
+    provider: Dict[str, Any],
+    query: str,
+    *,
+    max_items: int,
+    include_auctions: bool,
+) -> tuple[Dict[str, Any], List[Product], str]:
+    return submit_scrape(
+        provider,
+        query,
+        max_items=max_items,
+        include_auctions=include_auctions,
+    ).result()
+
+
+def sort_by_field(products: List[Product], field: str, *, descending: bool = False) -> List[Product]:
+    """
+    Sorts on a single numeric field, keeping products without a value last in input order.
+    Splitting them out first lets the sort key be a plain attrgetter instead of a tuple per product.
+    """
+    value_of = attrgetter(field)
+    present = [product for product in products if value_of(product) is not None]
+    missing = [product for product in products if value_of(product) is None]
+    present.sort(key=value_of, reverse=descending)
+    present.extend(missing)
+    return present
+
+
+def sort_products(products: List[Product], query: str, sort_by: str) -> List[Product]:
+    if sort_by in FIELD_SORTS:
+        field, descending = FIELD_SORTS[sort_by]
+        return sort_by_field(products, field, descending=descending)
+    return sorted(products, key=make_relevance_key(query_tokens(query), query.lower()))
+
+
+def merge_ranked(ranked_lists: List[List[Product]], query: str, sort_by: str) -> List[Product]:
+    """
+    Merges lists already ordered by sort_products into one list in the same order that sorting
+    their concatenation would give (ties keep list order), without re-sorting everything.
+    """
+    if sort_by not in FIELD_SORTS:
+        return list(heapq.merge(*ranked_lists, key=make_relevance_key(query_tokens(query), query.lower())))
+    field, descending = FIELD_SORTS[sort_by]
+    value_of = attrgetter(field)
+    present = [[product for product in ranked if value_of(product) is not None] for ranked in ranked_lists]
+    merged = list(heapq.merge(*present, key=value_of, reverse=descending))
+    merged.extend(product for ranked in ranked_lists for product in ranked if value_of(product) is None)
+    return merged
+
+
+def iter_provider_batches(
+    query: str,
+    *,
+    max_items_per_site: int,
+    include_auctions: bool,
+    window_sec: float = 0.0,
+) -> Iterator[List[tuple[Dict[str, Any], List[Product], str]]]:
+    """
+    Yields lists of (provider, products, status) as scrapes finish. Once one finishes, waits up
+    to window_sec for others, so providers completing together come out as a single batch.
+    Closing the generator early (e.g. a client disconnect) cancels the scrapes still pending.
+    """
+    encoded_query = quote_plus(query)
+    futures = [
+        submit_scrape(
+            provider,
+            query,
+            max_items=max_items_per_site,
+            include_auctions=include_auctions,
+            encoded_query=encoded_query,
+        )
+        for provider in SEARCH_PROVIDERS
+    ]
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            if pending and window_sec > 0:
+                late, pending = wait(pending, timeout=window_sec)
+                done |= late
+            yield [future.result() for future in futures if future in done]
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def iter_provider_results(
+    query: str,
+    *,
+    max_items_per_site: int,
+    include_auctions: bool,
+) -> Iterator[tuple[Dict[str, Any], List[Product], str]]:
+    """Yields (provider, products, status) for each provider as soon as its scrape finishes."""
+    for batch in iter_provider_batches(
+        query,
+        max_items_per_site=max_items_per_site,
+        include_auctions=include_auctions,
+    ):
+        yield from batch
+
+
+def merge_provider_results(per_provider: Dict[str, List[Product]]) -> List[Product]:
+    """Concatenates per-provider results in SEARCH_PROVIDERS order, regardless of completion order."""
+    return list(chain.from_iterable(per_provider.get(provider["id"], ()) for provider in SEARCH_PROVIDERS))
+
+
+def cached_results(cache_key: tuple, query: str, sort_by: str) -> List[Product] | None:
+    """
+    Cache entries hold the unsorted products plus each ordering already served, so a repeat
+    search skips sorting and a sort toggle sorts the cached products once.
+    """
+    entry = _result_cache.get(cache_key)
+    if entry is None:
+        return None
+    products, by_sort = entry
+    ranked = by_sort.get(sort_by)
+    if ranked is None:
+        ranked = by_sort[sort_by] = tuple(sort_products(list(products), query, sort_by))
+    return list(ranked)
+
+
+def cache_results(
+    cache_key: tuple,
+    products: List[Product],
+    sort_by: str,
+    ranked: List[Product],
+    *,
+    failed: int,
+) -> None:
+    """
+    Caches a search only when every provider answered, so gaps from timed-out or failed
+    providers aren't replayed. The providers that did answer are still in _provider_cache.
+    """
+    if not failed:
+        _result_cache.set(cache_key, (tuple(products), {sort_by: tuple(ranked)}))
+
+
+def is_complete_search(query: str, max_items: int, include_auctions: bool) -> bool:
+    """Only complete searches reach _result_cache, so an entry there marks one."""
+    return _result_cache.get((query, max_items, include_auctions)) is not None
+
+
 def scrape_all_providers(
     query: str,
     *,
@@ -918,24 +1480,24 @@ def scrape_all_providers(
     include_auctions: bool = True,
     sort_by: str = "relevance",
 ) -> List[Product]:
-    all_products: List[Product] = []
+    cache_key = (query, max_items_per_site, include_auctions)
+    cached = cached_results(cache_key, query, sort_by)
+    if cached is not None:
+        return cached
+
+    per_provider: Dict[str, List[Product]] = {}
     started = time.perf_counter()
+    failed = 0
 
-    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_PROVIDERS) as executor:
-        futures = [
-            executor.submit(
-                scrape_provider_standalone,
-                provider,
-                query,
-                max_items=max_items_per_site,
-                include_auctions=include_auctions,
-            )
-            for provider in SEARCH_PROVIDERS
-        ]
-        for future in as_completed(futures):
-            _, products, _ = future.result()
-            all_products.extend(products)
+    for provider, products, status in iter_provider_results(
+        query,
+        max_items_per_site=max_items_per_site,
+        include_auctions=include_auctions,
+    ):
+        per_provider[provider["id"]] = products
+        failed += status != "ok"
 
+    all_products = merge_provider_results(per_provider)
     elapsed = time.perf_counter() - started
     logger.info(
         "scraped %s products in %.2fs across %s sites",
@@ -943,60 +1505,84 @@ def scrape_all_providers(
         elapsed,
         len(SEARCH_PROVIDERS),
     )
-    return sort_products(all_products, query, sort_by)
+    ranked = sort_products(all_products, query, sort_by)
+    cache_results(cache_key, all_products, sort_by, ranked, failed=failed)
+    return ranked
 
 
 def stream_scrape_events(query: str, *, max_items_per_site: int, include_auctions: bool, sort_by: str):
+    cache_key = (query, max_items_per_site, include_auctions)
+    cached = cached_results(cache_key, query, sort_by)
+    if cached is not None:
+        yield {
+            "type": "done",
+            "elapsed": 0,
+            "cached": True,
+            "results": cached,
+        }
+        return
+
     total = len(SEARCH_PROVIDERS)
-    all_products: List[Product] = []
+    per_provider: Dict[str, List[Product]] = {}
+    ranked_per_provider: Dict[str, List[Product]] = {}
     started = time.perf_counter()
 
     completed = 0
-    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_PROVIDERS) as executor:
-        futures = [
-            executor.submit(
-                scrape_provider_standalone,
-                provider,
-                query,
-                max_items=max_items_per_site,
-                include_auctions=include_auctions,
-            )
-            for provider in SEARCH_PROVIDERS
-        ]
-        for future in as_completed(futures):
-            provider, products, status = future.result()
-            all_products.extend(products)
+    failed = 0
+    for batch in iter_provider_batches(
+        query,
+        max_items_per_site=max_items_per_site,
+        include_auctions=include_auctions,
+        window_sec=PROGRESS_BATCH_WINDOW_SEC,
+    ):
+        events = []
+        partial: List[Product] = []
+        for provider, products, status in batch:
+            per_provider[provider["id"]] = products
+            ranked_per_provider[provider["id"]] = sort_products(products, query, sort_by)
+            partial.extend(ranked_per_provider[provider["id"]])
             completed += 1
-            yield {
-                "type": "progress",
+            failed += status != "ok"
+            events.append({
                 "provider": provider["name"],
                 "provider_id": provider["id"],
                 "completed": completed,
                 "total": total,
                 "status": status,
                 "found": len(products),
-            }
+            })
+        yield {"type": "progress_batch", "events": events}
+        if partial:
+            yield {"type": "partial", "results": partial}
 
     elapsed = time.perf_counter() - started
-    all_products = sort_products(all_products, query, sort_by)
+    all_products = merge_provider_results(per_provider)
+    ranked = merge_ranked(
+        [ranked_per_provider[provider["id"]] for provider in SEARCH_PROVIDERS if provider["id"] in ranked_per_provider],
+        query,
+        sort_by,
+    )
+    cache_results(cache_key, all_products, sort_by, ranked, failed=failed)
     yield {
         "type": "done",
         "elapsed": round(elapsed, 2),
-        "results": [asdict(p) for p in all_products],
+        "results": ranked,
     }
 
 
 def save_to_csv(products: List[Product], csv_path: str) -> None:
-    with open(csv_path, "w", newline="", encoding="utf-8") as file_handle:
+    with open(csv_path, "w", newline="", encoding="utf-8", buffering=1 << 20) as file_handle:
         writer = csv.writer(file_handle)
         writer.writerow(["name", "price", "url", "source"])
-        for product in products:
-            writer.writerow([
+        writer.writerows(
+            (
                 product.name,
-                "" if product.price is None else f"{product.price:.2f}",
+                "" if product.price is None else format(product.price, ".2f"),
                 product.url,
                 product.source,
-            ])
+            )
+            for product in products
+        )
 
 
 def group_by_source(products: Iterable[Product]) -> Dict[str, List[Product]]:
@@ -1032,6 +1618,11 @@ def index():
                 providers=SEARCH_PROVIDERS,
                 error_message="Too many requests. Please wait a moment and try again.",
             ), 429
+        # The template echoes the raw limit/sort/auctions args back into the form.
+        page_key = (query, request.args.get("limit"), request.args.get("sort"), request.args.get("auctions"))
+        page = _page_cache.get(page_key)
+        if page is not None:
+            return Response(page, mimetype="text/html")
         products = scrape_all_providers(
             query,
             max_items_per_site=max_items,
@@ -1040,7 +1631,7 @@ def index():
         )
         grouped = group_by_source(products)
 
-    return render_template(
+    html = render_template(
         "index.html",
         query=query,
         products=products,
@@ -1048,6 +1639,10 @@ def index():
         providers=SEARCH_PROVIDERS,
         error_message=None,
     )
+    # The page lives only as long as its complete search, so partial results aren't replayed.
+    if products and is_complete_search(query, max_items, include_auctions):
+        _page_cache.set(page_key, html.encode())
+    return html
 
 
 @app.route("/api/search")
@@ -1069,13 +1664,19 @@ def api_search():
     if is_rate_limited(client_ip()):
         return jsonify({"error": "Rate limit exceeded. Try again shortly."}), 429
 
+    started = time.perf_counter()
     products = scrape_all_providers(
         query,
         max_items_per_site=max_items,
         include_auctions=include_auctions,
         sort_by=sort_by,
     )
-    return jsonify({"results": [asdict(p) for p in products]})
+    response = jsonify({"results": products})
+    # Same test as the index page cache: never let browsers or CDNs replay a partial search.
+    if products and is_complete_search(query, max_items, include_auctions):
+        response.headers["Cache-Control"] = "public, max-age=30"
+    response.headers["Server-Timing"] = f"scrape;dur={(time.perf_counter() - started) * 1000:.0f}"
+    return response
 
 
 @app.route("/api/search/stream")
@@ -1098,13 +1699,14 @@ def api_search_stream():
         return jsonify({"error": "Rate limit exceeded. Try again shortly."}), 429
 
     def event_stream():
+        yield SSE_PADDING
         for event in stream_scrape_events(
             query,
             max_items_per_site=max_items,
             include_auctions=include_auctions,
             sort_by=sort_by,
         ):
-            yield f"data: {json.dumps(event)}\n\n"
+            yield b"data: " + orjson.dumps(event) + b"\n\n"
 
     return Response(
         event_stream(),
@@ -1113,6 +1715,46 @@ def api_search_stream():
     )
 
 
+@app.route("/api/search/ndjson")
+def api_search_ndjson():
+    query = normalize_query(request.args.get("q") or "")
+    max_items = parse_int_param(
+        request.args.get("limit"),
+        MAX_ITEMS_PER_SITE_DEFAULT,
+        min_value=5,
+        max_value=120,
+    )
+    include_auctions = parse_bool_flag(request.args.get("auctions"), True)
+    sort_by = (request.args.get("sort") or "relevance").strip()
+    if sort_by not in ALLOWED_SORTS:
+        sort_by = "relevance"
+
+    if not query:
+        return jsonify({"error": "Query is required"}), 400
+    if is_rate_limited(client_ip()):
+        return jsonify({"error": "Rate limit exceeded. Try again shortly."}), 429
+
+    def ndjson_stream():
+        for provider, products, status in iter_provider_results(
+            query,
+            max_items_per_site=max_items,
+            include_auctions=include_auctions,
+        ):
+            line = {
+                "provider": provider["name"],
+                "provider_id": provider["id"],
+                "status": status,
+                "results": sort_products(products, query, sort_by),
+            }
+            yield orjson.dumps(line) + b"\n"
+
+    return Response(
+        ndjson_stream(),
+        mimetype="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.route("/health")
 def health():
     return {
@@ -1127,10 +1769,29 @@ def robots():
         "User-agent: *",
         "Disallow: /api/search",
         "Disallow: /api/search/stream",
+        "Disallow: /api/search/ndjson",
     ]
     return Response("\n".join(lines), mimetype="text/plain")
 
 
+def warm_up() -> None:
+    """
+    Starts the scrape loop and launches the shared browser ahead of the first search,
+    so the first user doesn't pay the Chromium cold start.
+    """
+    started = time.perf_counter()
+    try:
+        asyncio.run_coroutine_threadsafe(get_browser(), get_scrape_loop()).result()
+    except Exception:
+        logger.warning("browser warmup failed", exc_info=True)
+        return
+    logger.info("browser warmed up in %.2fs", time.perf_counter() - started)
+
+
+if WARMUP_ON_START:
+    threading.Thread(target=warm_up, name="warmup", daemon=True).start()
+
+
 if __name__ == "__main__":
     host = os.getenv("APP_HOST", "0.0.0.0")
     port = env_int("PORT", 5000, min_value=1, max_value=65535)